@@ -0,0 +1,265 @@
+"""
+    Sphinxsharp performance gate
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Builds generated projects of growing size with Sphinx testing app and
+    checks per-unit cost of the domain hot paths: its absolute value (relative to
+    docutils parsing of one reST paragraph, so budgets hold across machines) and
+    its growth with project size. Budgets are read from ``benchmark.json``;
+    they sit above the spread of several runs on the default and smaller sizes,
+    low enough that doubled cost or quadratic growth fails. ``clear_doc`` growth
+    budget allows for the cache misses of the larger domain tables.
+
+    Usage: ``python -m sphinxsharp.benchmark [--sizes 1000 10000] [--budgets file]``
+
+    :copyright: Copyright 2021 by MadTeddy
+"""
+
+import gc
+import sys
+import json
+import math
+import shutil
+import argparse
+import tempfile
+
+from os import path
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+from docutils import nodes
+from docutils.core import publish_doctree
+
+from sphinx import addnodes
+from sphinx.testing.util import SphinxTestApp
+
+from sphinxsharp.sphinxsharp import CSharpIndex
+
+BUDGETS_FILE = path.join(path.abspath(path.dirname(__file__)), 'benchmark.json')
+
+TYPE_TEMPLATE = '''
+.. sphinxsharp:namespace:: Bench.Doc{d}
+
+.. sphinxsharp:type:: public class Type{n} : Base{n}
+
+   Type :sphinxsharp:type:`Type{n}`, see :sphinxsharp:meth:`Type{n}.Run`.
+
+.. sphinxsharp:method:: public Type{n} Run(int count, ref Type{n} other = null)
+
+.. sphinxsharp:property:: public Type{n} Self {{ get; set; }}
+
+.. sphinxsharp:variable:: public int Count = 0
+
+.. sphinxsharp:end-type::
+'''
+
+
+CALIBRATION_PARAGRAPHS = 20
+CALIBRATION_TEXT = '\n\n'.join(
+    'Paragraph {} with *emphasis*, ``literal`` and `link <https://example.com/{}>`_.'.format(i, i)
+    for i in range(CALIBRATION_PARAGRAPHS))
+
+
+def write_project(srcdir, size, objects_per_doc):
+    """
+    Writes project with ``size`` objects, ``objects_per_doc`` in each document
+    """
+    srcdir.mkdir(parents=True, exist_ok=True)
+    (srcdir / 'conf.py').write_text("extensions = ['sphinxsharp.sphinxsharp']\n", encoding='utf-8')
+    (srcdir / 'index.rst').write_text('Index\n=====\n\n.. toctree::\n   :glob:\n\n   doc*\n', encoding='utf-8')
+    types_per_doc = max(1, objects_per_doc // 4)
+    docs = max(1, size // (types_per_doc * 4))
+    for d in range(docs):
+        parts = ['Doc {}\n========\n'.format(d)]
+        for n in range(types_per_doc):
+            parts.append(TYPE_TEMPLATE.format(d=d, n=n))
+        (srcdir / 'doc{}.rst'.format(d)).write_text(''.join(parts), encoding='utf-8')
+
+
+def timeit(func):
+    """
+    Like ``timeit`` module, runs ``func`` with disabled GC: collection cost depends on
+    the whole heap (doctrees etc.), not on the measured code
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = perf_counter()
+        func()
+        return perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def calibrate():
+    """
+    Returns seconds docutils spends on one reST paragraph on this machine right now
+    """
+    return timeit(lambda: publish_doctree(CALIBRATION_TEXT, settings_overrides={'report_level': 5})) \
+        / CALIBRATION_PARAGRAPHS
+
+
+def sample(func, setup, number):
+    total = 0
+    for _ in range(number):
+        if setup is not None:
+            setup()
+        total += timeit(func)
+    return total
+
+
+def relative(func, setup=None, repeat=7, min_time=0.05):
+    """
+    Returns ``func`` call cost in ``calibrate`` units. Each sample calls ``func`` (after
+    untimed ``setup``) enough times to take at least ``min_time`` and is paired with a
+    calibration right after it, so machine speed changes between samples cancel out;
+    median of the pairs is used
+    """
+    number = 1
+    while sample(func, setup, number) < min_time:
+        number *= 2
+    ratios = []
+    for _ in range(repeat):
+        elapsed = sample(func, setup, number) / number
+        ratios.append(elapsed / calibrate())
+    return median(ratios)
+
+
+def measure(size, objects_per_doc):
+    """
+    Returns ``{metric: cost per unit}`` for project of ``size`` objects, in ``calibrate`` units
+    """
+    tempdir = tempfile.mkdtemp(prefix='sphinxsharp-bench-')
+    try:
+        srcdir = Path(tempdir) / 'src'
+        write_project(srcdir, size, objects_per_doc)
+        app = SphinxTestApp('dummy', srcdir=srcdir, builddir=Path(tempdir) / 'build', freshenv=True)
+        try:
+            read = {'units': [], 'excluded': 0}
+
+            def read_started(app, env, docnames):
+                read['start'] = read['last'] = perf_counter()
+                read['units'].append(calibrate())
+
+            def doctree_read(app, doctree):
+                # calibrate along the build, machine speed may change while it runs
+                now = perf_counter()
+                if now - read['last'] >= 0.5:
+                    read['units'].append(calibrate())
+                    read['last'] = perf_counter()
+                    read['excluded'] += read['last'] - now
+
+            def read_finished(app, env):
+                read['end'] = perf_counter()
+
+            app.connect('env-before-read-docs', read_started)
+            app.connect('doctree-read', doctree_read)
+            app.connect('env-updated', read_finished)
+            app.build()
+
+            env = app.env
+            domain = env.get_domain('sphinxsharp')
+            objects = len(domain.data['objects'])
+
+            refs = []
+            for docname in sorted(domain.data['docs']):
+                for node in env.get_doctree(docname).findall(addnodes.pending_xref):
+                    if node.get('refdomain') == 'sphinxsharp':
+                        refs.append((docname, node))
+            contnode = nodes.literal()
+
+            def resolve():
+                for docname, node in refs:
+                    domain.resolve_xref(env, docname, app.builder, node['reftype'],
+                                        node['reftarget'], node, contnode)
+
+            def index():
+                CSharpIndex(domain).generate()
+
+            docnames = sorted(domain.data['docs'])
+            snapshot = {key: value.copy() for key, value in domain.data.items() if isinstance(value, (dict, set))}
+
+            def restore():
+                for key, value in snapshot.items():
+                    domain.data[key] = value.copy()
+
+            def clear():
+                for docname in docnames:
+                    domain.clear_doc(docname)
+
+            read_time = read['end'] - read['start'] - read['excluded']
+            result = {
+                'read': read_time / objects / median(read['units']),
+                'resolve_xref': relative(resolve) / max(1, len(refs)),
+                # sorting makes n log n the linear-cost unit of index generation
+                'index': relative(index) / (objects * math.log2(objects))
+            }
+            # clear_doc goes last: every sample empties the domain
+            result['clear_doc'] = relative(clear, setup=restore) / len(docnames)
+            return result
+        finally:
+            app.cleanup()
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+def measure_best(size, objects_per_doc, repeat):
+    """
+    Returns per-metric median of ``repeat`` measurements
+    """
+    results = [measure(size, objects_per_doc) for _ in range(repeat)]
+    return {metric: median(result[metric] for result in results) for metric in results[0]}
+
+
+def growth(sizes, costs):
+    """
+    Per-unit cost growth exponent, least squares fit of log(cost) over log(size)
+    across all sizes: 0 is linear, 1 is quadratic
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(cost) for cost in costs]
+    mx = sum(xs) / len(xs)
+    my = sum(ys) / len(ys)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sphinxsharp.benchmark')
+    parser.add_argument('--budgets', default=BUDGETS_FILE)
+    parser.add_argument('--sizes', type=int, nargs='+')
+    args = parser.parse_args(argv)
+
+    with open(args.budgets, encoding='utf-8') as f:
+        budgets = json.load(f)
+    sizes = sorted(args.sizes or budgets['sizes'])
+    if len(sizes) < 2:
+        parser.error('at least two sizes are required')
+
+    results = []
+    for size in sizes:
+        # small projects are timed several times, so one noisy build can't decide the result
+        repeat = min(budgets['max_repeat'], max(1, math.ceil(budgets['min_timed_objects'] / size)))
+        results.append(measure_best(size, budgets['objects_per_doc'], repeat))
+
+    failed = False
+    print('costs are per unit, relative to docutils parsing of one reST paragraph')
+    print('{:<14}{}{:>10}{:>8}{:>10}{:>8}'.format(
+        'metric', ''.join('{:>12}'.format(s) for s in sizes), 'cost', 'max', 'growth', 'max'))
+    for metric in sorted(budgets['max_growth']):
+        costs = [result[metric] for result in results]
+        cost = max(costs)
+        exponent = growth(sizes, costs)
+        max_cost = budgets['max_cost'][metric]
+        max_growth = budgets['max_growth'][metric]
+        ok = cost <= max_cost and exponent <= max_growth
+        failed = failed or not ok
+        print('{:<14}{}{:>10.4g}{:>8.4g}{:>10.2f}{:>8.2f}{}'.format(
+            metric, ''.join('{:>12.4g}'.format(c) for c in costs), cost, max_cost,
+            exponent, max_growth, '' if ok else '  FAILED'))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,8 +8,12 @@
 """
 
 import re
+import sys
+import json
+import tempfile
 import warnings
 
+import os
 from os import path
 
 from collections import defaultdict, namedtuple
@@ -50,6 +54,7 @@ PROP_SIG_RE = re.compile(r'^((?:(?:' + MODIFIERS_RE
                          + r')\s+)*)?(.+)\s+([^\s]+)\s*(?:{(\s*get;\s*)?((?:'
                          + MODIFIERS_RE + r')?\s*set;\s*)?})$')
 ENUM_SIG_RE = re.compile(r'^((?:(?:' + MODIFIERS_RE + r')\s+)*)?(?:enum)\s?(\w+)$')
+ENUM_MEMBER_RE = re.compile(r'^(\w+)\s*(?:=\s*(.+?))?\s*(?:--\s*(.*))?$')
 
 _ = get_translation('sphinxsharp')
 
@@ -57,6 +62,7 @@ _ = get_translation('sphinxsharp')
 class CSharpObject(ObjectDescription):
     PARENT_ATTR_NAME = 'sphinxsharp:parent'
     PARENT_TYPE_NAME = 'sphinxsharp:type'
+    SIGNATURES_ATTR_NAME = 'sphinxsharp:signatures'
 
     ParentType = namedtuple('ParentType', ['parent', 'name', 'type', 'override'])
 
@@ -179,16 +185,26 @@ class CSharpObject(ObjectDescription):
     def get_index_text(self, sig, name, typ):
         raise NotImplementedError('Must be implemented in subclass')
 
-    def parse_signature(self, sig):
+    @staticmethod
+    def parse_signature(sig):
         raise NotImplementedError('Must be implemented in subclass')
 
+    def get_parsed_signature(self, sig):
+        """
+        Returns ``parse_signature`` result, parsing each signature once per document
+        """
+        parsed = self.env.temp_data.setdefault(self.SIGNATURES_ATTR_NAME, {})
+        key = (self.objtype, sig.strip())
+        if key not in parsed:
+            parsed[key] = self.parse_signature(sig)
+        return parsed[key]
+
     def add_target_and_index(self, name, sig, signode):
         objname, objtype = self.get_obj_name(sig)
         type_parent = self.get_type_parent() if self.has_parent_type() else None
         if self.objtype != 'type' and type_parent:
-            self.env.ref_context[self.PARENT_ATTR_NAME] = '{}{}'.format(type_parent.parent + '.' \
-                                                                         if type_parent.parent else '',
-                                                                        type_parent.name)
+            self.env.ref_context[self.PARENT_ATTR_NAME] = self.scopes.get(
+                type_parent.parent or None).child(type_parent.name).fullname
             name = self.get_fullname(objname)
             self.names.clear()
             self.names.append(name)
@@ -205,6 +221,9 @@ class CSharpObject(ObjectDescription):
                 warnings.warn('duplicate description of {}, other instance in {}'.format(
                     key, self.env.doc2path(objects[key][0])), Warning)
             objects[key] = (self.env.docname, 'delegate' if self.objtype == 'method' else objtype)
+            self.env.domaindata['sphinxsharp']['docs'].setdefault(self.env.docname, set()).add(key)
+            if self.env.config.sphinxsharp_manifest:
+                self.env.domaindata['sphinxsharp']['manifest'][key] = sig.strip()
         index_text = self.get_index_text(sig, objname, objtype)
         if index_text:
             parent = self.get_parent() if self.has_parent() else None
@@ -225,10 +244,15 @@ class CSharpObject(ObjectDescription):
                 in_text=_('in')
             ), anchor, None, None))
 
+    @property
+    def scopes(self):
+        return self.env.get_domain('sphinxsharp').scopes
+
+    def get_scope(self):
+        return self.scopes.get(self.get_parent())
+
     def get_fullname(self, name):
-        fullname = '{parent}{name}'.format(
-            parent=self.get_parent() + '.' if self.has_parent() else '', name=name)
-        return fullname
+        return self.get_scope().qualify(name)
 
     def get_obj_name(self, sig):
         raise NotImplementedError('Must be implemented in subclass')
@@ -242,23 +266,21 @@ class CSharpObject(ObjectDescription):
             signode += addnodes.desc_type(text='new')
             signode += nodes.Text(' ')
         types = name.split('.')
-        explicit_path = []
+        path_scope = None
         i = 1
         for t in types:
             styp = t.strip()
-            explicit_path.append(styp)
             refnode = addnodes.pending_xref('', refdomain='sphinxsharp', reftype=None,
                                                             reftarget=styp, modname=None, classname=None)
-            if not self.has_parent():
-                refnode[self.PARENT_ATTR_NAME] = None
+            if path_scope is None:
+                refnode[self.PARENT_ATTR_NAME] = self.get_scope().fullname
+                if len(types) > 1:
+                    type_par = self.get_type_parent() if self.has_parent_type() else None
+                    path_scope = self.scopes.get(type_par.parent if type_par and type_par.parent else None)
             else:
-                refnode[self.PARENT_ATTR_NAME] = self.get_parent()
-            if len(explicit_path) > 1:
-                target_path = '.'.join(explicit_path[:-1])
-                type_par = self.get_type_parent() if self.has_parent_type() else None
-                refnode[self.PARENT_ATTR_NAME] = (type_par.parent + '.' \
-                                                    if type_par and type_par.parent \
-                                                    else '') + target_path
+                refnode[self.PARENT_ATTR_NAME] = path_scope.fullname
+            if path_scope is not None:
+                path_scope = path_scope.child(styp)
             refnode += addnodes.desc_type(text=styp)
             signode += refnode
             if i < len(types):
@@ -292,7 +314,7 @@ class CSharpType(CSharpObject):
             add_description(signode, _('namespace'), self.get_parent())
 
     def handle_signature(self, sig, signode):
-        mod, typ, name, generic, inherits = self.parse_signature(sig)
+        mod, typ, name, generic, inherits = self.get_parsed_signature(sig)
         signode += addnodes.desc_type(text='{}'.format(mod if mod else 'private'))
         signode += nodes.Text(' ')
         signode += addnodes.desc_type(text='{}'.format(typ))
@@ -312,8 +334,10 @@ class CSharpType(CSharpObject):
                     i += 1
 
         opt_parent = self.options['parent'] if 'parent' in self.options else None
-        form = '{}.{}' if self.has_parent() and opt_parent else '{}{}'
-        parent = form.format(self.get_parent() if self.has_parent() else '', opt_parent if opt_parent else '')
+        if opt_parent:
+            parent = self.get_scope().child(opt_parent).fullname
+        else:
+            parent = self.get_parent() if self.has_parent() else ''
         self.env.ref_context[CSharpObject.PARENT_TYPE_NAME] = self.ParentType(
             parent=parent, name=name, type=typ, override=opt_parent)
         if opt_parent:
@@ -324,7 +348,8 @@ class CSharpType(CSharpObject):
         rname = '{} (C# {})'.format(name, _(typ))
         return rname
 
-    def parse_signature(self, sig):
+    @staticmethod
+    def parse_signature(sig):
         match = TYPE_SIG_RE.match(sig.strip())
         if not match:
             raise Exception('Invalid type signature. Got: {}'.format(sig))
@@ -332,17 +357,20 @@ class CSharpType(CSharpObject):
         return mod, typ.strip(), names, generic, inherits
 
     def get_obj_name(self, sig):
-        _, typ, name, _, _ = self.parse_signature(sig)
+        _, typ, name, _, _ = self.get_parsed_signature(sig)
         return name, typ
 
 
 class CSharpEnum(CSharpObject):
     option_spec = {**CSharpObject.option_spec, 'values': directives.unchanged_required,
+                   'members': directives.flag,
                    **dict(zip([('val(' + str(i) + ')') for i in range(1, 21)],
                               [directives.unchanged] * 20))}
 
+    _members = ()
+
     def handle_signature(self, sig, signode):
-        mod, name = self.parse_signature(sig)
+        mod, name = self.get_parsed_signature(sig)
         if mod:
             signode += addnodes.desc_type(text='{}'.format(mod.strip()))
             signode += nodes.Text(' ')
@@ -351,7 +379,33 @@ class CSharpEnum(CSharpObject):
         signode += addnodes.desc_name(text='{}'.format(name.strip()))
         return self.get_fullname(name)
 
+    def before_content_node(self, node):
+        """
+        With ``:members:`` set, leading content lines (up to the first blank line)
+        are member entries in form ``Name [= value] [-- description]``
+        """
+        if 'members' not in self.options:
+            return
+        members = []
+        count = 0
+        for line in self.content:
+            count += 1
+            if not line.strip():
+                break
+            match = ENUM_MEMBER_RE.match(line.strip())
+            if not match:
+                raise Exception('Invalid enum member. Got: {}'.format(line))
+            members.append(match.groups())
+        self._members = members
+        self.content = self.content[count:]
+        self.content_offset += count
+
     def after_content_node(self, node):
+        if self._members:
+            node += self.make_members_table()
+            return
+        if 'values' not in self.options:
+            return
         options = self.options['values'].split()
         add_description(node, _('values').title(), ', '.join(options))
         options_values = list(value for key, value in self.options.items() \
@@ -364,7 +418,58 @@ class CSharpEnum(CSharpObject):
                 add_description(node, vname, options_values[i])
                 i += 1
 
-    def parse_signature(self, sig):
+    def make_members_table(self):
+        parent = self.names[0] if self.names else None
+        register = parent is not None and 'noindex' not in self.options
+        document = self.state.document
+
+        table = nodes.table(classes=['csharp-enum-members'])
+        tgroup = nodes.tgroup(cols=3)
+        table += tgroup
+        for width in (30, 20, 50):
+            tgroup += nodes.colspec(colwidth=width)
+        thead = nodes.thead()
+        thead += make_row((_('member').title(), _('value').title(), _('description').title()))
+        tgroup += thead
+        tbody = nodes.tbody()
+        tgroup += tbody
+
+        targets = {}
+        manifest = {}
+        for mname, mvalue, mdesc in self._members:
+            description = []
+            if mdesc:
+                textnodes, messages = self.state.inline_text(mdesc, self.lineno)
+                description = [nodes.paragraph(mdesc, '', *textnodes)] + messages
+            row = make_row((mname, mvalue, description))
+            if register:
+                name = '{}.{}'.format(parent, mname)
+                anchor = '{}-{}'.format(self.objtype, name)
+                if anchor not in document.ids:
+                    row['ids'].append(anchor)
+                    document.note_explicit_target(row)
+                    targets[(self.objtype, name)] = (self.env.docname, 'member')
+                    if self.env.config.sphinxsharp_manifest:
+                        manifest[(self.objtype, name)] = (mvalue, mdesc)
+            tbody += row
+
+        if targets:
+            objects = self.env.domaindata['sphinxsharp']['objects']
+            for key in targets.keys() & objects.keys():
+                warnings.warn('duplicate description of {}, other instance in {}'.format(
+                    key, self.env.doc2path(objects[key][0])), Warning)
+            objects.update(targets)
+            self.env.domaindata['sphinxsharp']['manifest'].update(manifest)
+            self.env.domaindata['sphinxsharp']['docs'].setdefault(self.env.docname, set()).update(targets)
+        return table
+
+    def after_content(self):
+        super().after_content()
+        if self._members:
+            del self._members
+
+    @staticmethod
+    def parse_signature(sig):
         match = ENUM_SIG_RE.match(sig.strip())
         if not match:
             raise Exception('Invalid enum signature. Got: {}'.format(sig))
@@ -376,7 +481,7 @@ class CSharpEnum(CSharpObject):
         return rname
 
     def get_obj_name(self, sig):
-        _, name = self.parse_signature(sig)
+        _, name = self.get_parsed_signature(sig)
         return name, 'enum'
 
 
@@ -385,7 +490,7 @@ class CSharpVariable(CSharpObject):
     _default = ''
 
     def handle_signature(self, sig, signode):
-        mod, typ, name, self._default = self.parse_signature(sig)
+        mod, typ, name, self._default = self.get_parsed_signature(sig)
         signode += addnodes.desc_type(text='{}'.format(mod if mod else 'private'))
         signode += nodes.Text(' ')
         self.append_ref_signature(typ, signode)
@@ -397,7 +502,8 @@ class CSharpVariable(CSharpObject):
         if self._default:
             add_description(node, _('value').title(), self._default)
 
-    def parse_signature(self, sig):
+    @staticmethod
+    def parse_signature(sig):
         match = VAR_SIG_RE.match(sig.strip())
         if not match:
             raise Exception('Invalid variable signature. Got: {}'.format(sig))
@@ -409,14 +515,14 @@ class CSharpVariable(CSharpObject):
         return rname
 
     def get_obj_name(self, sig):
-        _, typ, name, _ = self.parse_signature(sig)
+        _, typ, name, _ = self.get_parsed_signature(sig)
         return name, typ
 
 
 class CSharpProperty(CSharpObject):
 
     def handle_signature(self, sig, signode):
-        mod, typ, name, getter, setter = self.parse_signature(sig)
+        mod, typ, name, getter, setter = self.get_parsed_signature(sig)
         signode += addnodes.desc_type(text='{}'.format(mod if mod else 'private'))
         signode += nodes.Text(' ')
         self.append_ref_signature(typ, signode)
@@ -432,7 +538,8 @@ class CSharpProperty(CSharpObject):
         signode += nodes.Text(' } ')
         return self.get_fullname(name)
 
-    def parse_signature(self, sig):
+    @staticmethod
+    def parse_signature(sig):
         match = PROP_SIG_RE.match(sig.strip())
         if not match:
             raise Exception('Invalid property signature. Got: {}'.format(sig))
@@ -444,7 +551,7 @@ class CSharpProperty(CSharpObject):
         return rname
 
     def get_obj_name(self, sig):
-        _, typ, name, _, _ = self.parse_signature(sig)
+        _, typ, name, _, _ = self.get_parsed_signature(sig)
         return name, typ
 
 
@@ -457,7 +564,7 @@ class CSharpMethod(CSharpObject):
     _params_list = ()
 
     def handle_signature(self, sig, signode):
-        mod, typ, name, generic, params = self.parse_signature(sig)
+        mod, typ, name, generic, params = self.get_parsed_signature(sig)
         signode += addnodes.desc_type(text='{}'.format(mod.strip() if mod else 'private'))
         signode += nodes.Text(' ')
         self.append_ref_signature(typ if typ else name, signode)
@@ -501,7 +608,8 @@ class CSharpMethod(CSharpObject):
         if self._params_list is not None and len(self._params_list) > 0:
             del self._params_list
 
-    def parse_signature(self, sig):
+    @staticmethod
+    def parse_signature(sig):
         match = METHOD_SIG_RE.match(sig.strip())
         if not match:
             raise Exception('Invalid method signature. Got: {}'.format(sig))
@@ -540,7 +648,7 @@ class CSharpMethod(CSharpObject):
         return rname
 
     def get_obj_name(self, sig):
-        _, typ, name, _, _ = self.parse_signature(sig)
+        _, typ, name, _, _ = self.get_parsed_signature(sig)
         return name, typ
 
 
@@ -630,13 +738,26 @@ class CSharpDomain(Domain):
     }
 
     initial_data = {
-        'objects': {}  # (objtype, name) -> (docname, objtype(class, struct etc.))
+        'objects': {},  # (objtype, name) -> (docname, objtype(class, struct etc.))
+        'manifest': {},  # (objtype, name) -> sig or (value, description) of enum member, see sphinxsharp_manifest
+        'docs': {},  # docname -> {(objtype, name)}
+        'purged': set()  # docnames whose manifest records are not rewritten yet
     }
 
+    data_version = 5
+
+    def __init__(self, env):
+        super().__init__(env)
+        self.scopes = ScopeTrie()
+
     def clear_doc(self, docname):
-        for (objtype, name), (doc, _) in self.data['objects'].copy().items():
-            if doc == docname:
-                del self.data['objects'][(objtype, name)]
+        if self.env.config.sphinxsharp_manifest:
+            self.data['purged'].add(docname)
+        objects = self.data['objects']
+        for key in self.data['docs'].pop(docname, ()):
+            if key in objects and objects[key][0] == docname:
+                del objects[key]
+                self.data['manifest'].pop(key, None)
 
     def get_objects(self):
         for (objtype, name), (docname, _) in self.data['objects'].items():
@@ -644,17 +765,19 @@ class CSharpDomain(Domain):
 
     def resolve_xref(self, env, fromdocname, builder,
                      typ, target, node, contnode):
-        targets = get_targets(target, node)
+        targets = get_targets(target, node, self.scopes)
 
         objects = self.data['objects']
         roletypes = self.objtypes_for_role(typ)
 
         types = ('type', 'enum', 'method') if typ is None else roletypes
 
-        for t in targets:
+        for scope, t in targets:
             for objtyp in types:
                 key = (objtyp, t)
                 if key in objects:
+                    if scope is not None:
+                        scope.remember(target, t)
                     obj = objects[key]
                     if typ is not None: 
                         role = self.role_for_objtype(objtyp)
@@ -668,6 +791,10 @@ class CSharpDomain(Domain):
         for (objtype, name), (docname, typ) in otherdata['objects'].items():
             if docname in docnames:
                 self.data['objects'][(objtype, name)] = (docname, typ)
+                self.data['docs'].setdefault(docname, set()).add((objtype, name))
+                if (objtype, name) in otherdata['manifest']:
+                    self.data['manifest'][(objtype, name)] = otherdata['manifest'][(objtype, name)]
+        self.data['purged'] |= otherdata['purged']
 
     def resolve_any_xref(self, env, fromdocname, builder, target, node, contnode):
         for typ in self.roles:
@@ -691,6 +818,73 @@ class EmptyNode(nodes.Element):
     def depart_html(self, node): pass
 
 
+class Scope(object):
+    """
+    Node of ``ScopeTrie``. ``fullname`` is the interned dotted name used as scope id
+    in ``ref_context`` and ``pending_xref`` nodes, ``chain`` lists the node and
+    its ancestors (innermost first) for candidate targets resolving
+    """
+    __slots__ = ('parent', 'name', 'fullname', 'chain', 'children', '_paths', '_qualified')
+
+    def __init__(self, parent=None, name=None):
+        self.parent = parent
+        self.name = name
+        self.children = {}
+        self._paths = {}
+        self._qualified = {}
+        if parent is None:
+            self.fullname = None
+            self.chain = ()
+        else:
+            self.fullname = sys.intern(parent.qualify(name))
+            self.chain = (self,) + parent.chain
+
+    def child(self, name):
+        if '.' not in name:
+            return self.children.get(name) or self._add_child(name)
+        node = self._paths.get(name)
+        if node is None:
+            node = self
+            for part in name.split('.'):
+                node = node.child(part)
+            self._paths[name] = node
+        return node
+
+    def _add_child(self, name):
+        node = self.children[name] = Scope(self, name)
+        return node
+
+    def qualify(self, name):
+        if self.fullname is None:
+            return name
+        qualified = self._qualified.get(name)
+        if qualified is None:
+            qualified = '{}.{}'.format(self.fullname, name)
+        return qualified
+
+    def remember(self, name, qualified):
+        """
+        Memoizes ``qualify`` result, called only for names resolved in this scope
+        """
+        self._qualified[name] = qualified
+
+
+class ScopeTrie(object):
+    """
+    Namespaces and types trie, nodes are created once per full name
+    """
+
+    def __init__(self):
+        self.root = Scope()
+        self._scopes = {None: self.root}
+
+    def get(self, fullname):
+        node = self._scopes.get(fullname)
+        if node is None:
+            node = self._scopes[fullname] = self.root.child(fullname)
+        return node
+
+
 def split_sig(params):
     if not params:
         return None
@@ -711,14 +905,10 @@ def split_sig(params):
         result.append(current)
     return result
 
-def get_targets(target, node):
-    targets = [target]
-    if node[CSharpObject.PARENT_ATTR_NAME] is not None:
-        parts = node[CSharpObject.PARENT_ATTR_NAME].split('.')
-        while parts:
-            targets.append('{}.{}'.format('.'.join(parts), target))
-            parts = parts[:-1]
-    return targets
+def get_targets(target, node, scopes):
+    yield None, target
+    for scope in scopes.get(node[CSharpObject.PARENT_ATTR_NAME]).chain:
+        yield scope, scope.qualify(target)
 
 def add_description(node, title, text, **kwargs):
     desc = nodes.container()
@@ -729,12 +919,114 @@ def add_description(node, title, text, **kwargs):
     desc += nodes.Text(text)
     node += desc
 
+def make_row(cells):
+    """
+    Cell is either a literal text or a list of nodes
+    """
+    row = nodes.row()
+    for cell in cells:
+        entry = nodes.entry()
+        if isinstance(cell, str):
+            entry += nodes.paragraph(text=cell)
+        elif cell:
+            entry.extend(cell)
+        row += entry
+    return row
+
+def get_manifest_record(domain, objtype, name, docname, typ):
+    record = {
+        'name': name,
+        'objtype': objtype,
+        'type': typ,
+        'docname': docname,
+        'anchor': '{}-{}'.format(objtype, name)
+    }
+    sig = domain.data['manifest'].get((objtype, name))
+    if sig is None:
+        return record
+    if isinstance(sig, tuple):
+        record['value'], record['description'] = sig
+        return record
+    record['signature'] = sig
+    try:
+        parsed = domain.directives[objtype].parse_signature(sig)
+    except Exception:
+        return record
+    mod = parsed[0]
+    record['modifiers'] = mod.split() if mod else []
+    if objtype == 'type':
+        _, _, _, generic, inherits = parsed
+        record['generic'] = generic
+        record['inherits'] = [t.strip() for t in split_sig(inherits)] if inherits else []
+    elif objtype == 'variable':
+        record['value'] = parsed[3]
+    elif objtype == 'property':
+        _, _, _, getter, setter = parsed
+        record['accessors'] = (['get'] if getter else []) + ([setter.strip().rstrip(';')] if setter else [])
+    elif objtype == 'method':
+        _, returns, _, generic, params = parsed
+        record['returns'] = returns.strip() if returns else None
+        record['generic'] = generic
+        record['params'] = []
+        for param in split_sig(params) or ():
+            try:
+                pmod, ptyp, pname, pvalue = CSharpMethod.parse_param_signature(param)
+            except Exception:
+                continue
+            record['params'].append({'modifier': pmod, 'type': ptyp, 'name': pname, 'default': pvalue})
+    return record
+
+def write_manifest(app, exception):
+    """
+    Streams one JSON record per domain object into ``sphinxsharp_manifest`` (relative to outdir).
+    If the file exists, only records of purged (changed or removed) documents are rewritten
+    and records of documents that are no longer in the project are dropped.
+    Purged docnames are kept in domain data (pickled with env) until a successful write
+    """
+    if exception or not app.config.sphinxsharp_manifest:
+        return
+    domain = app.env.get_domain('sphinxsharp')
+    filename = path.join(app.outdir, app.config.sphinxsharp_manifest)
+    if path.exists(filename):
+        if not domain.data['purged']:
+            return
+        docnames = domain.data['purged']
+    else:
+        docnames = None
+    fd, temp = tempfile.mkstemp(dir=path.dirname(filename), suffix='.tmp')
+    try:
+        with open(fd, 'w', encoding='utf-8') as out:
+            if docnames is not None:
+                # documents deleted before a fresh-env build are never purged, drop them too
+                all_docs = app.env.all_docs
+                with open(filename, encoding='utf-8') as old:
+                    for line in old:
+                        if not line.strip():
+                            continue
+                        docname = json.loads(line)['docname']
+                        if docname in all_docs and docname not in docnames:
+                            out.write(line)
+            for (objtype, name), (docname, typ) in domain.data['objects'].items():
+                if docnames is None or docname in docnames:
+                    out.write(json.dumps(get_manifest_record(domain, objtype, name, docname, typ),
+                                         ensure_ascii=False))
+                    out.write('\n')
+        os.chmod(temp, 0o644)
+        os.replace(temp, filename)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    domain.data['purged'].clear()
+
 def setup(app):
     package_dir = path.abspath(path.dirname(__file__))
 
     app.add_domain(CSharpDomain)
     app.add_node(EmptyNode, html=(EmptyNode.visit_html, EmptyNode.depart_html))
 
+    app.add_config_value('sphinxsharp_manifest', None, 'env')
+    app.connect('build-finished', write_manifest)
+
     locale_dir = path.join(package_dir, 'locales')
     app.add_message_catalog('sphinxsharp', locale_dir)
     return {
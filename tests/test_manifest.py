@@ -0,0 +1,48 @@
+import json
+
+from sphinx.testing.util import SphinxTestApp
+
+
+def write_docs(srcdir, docs):
+    srcdir.mkdir(parents=True, exist_ok=True)
+    (srcdir / 'conf.py').write_text("extensions = ['sphinxsharp.sphinxsharp']\n"
+                                    "sphinxsharp_manifest = 'api.ndjson'\n", encoding='utf-8')
+    toctree = ''.join('   {}\n'.format(docname) for docname in docs)
+    (srcdir / 'index.rst').write_text('Index\n=====\n\n.. toctree::\n\n' + toctree, encoding='utf-8')
+    for docname, text in docs.items():
+        (srcdir / '{}.rst'.format(docname)).write_text(text, encoding='utf-8')
+
+
+def build(srcdir, builddir, freshenv=False):
+    app = SphinxTestApp('html', srcdir=srcdir, builddir=builddir, freshenv=freshenv)
+    try:
+        app.build()
+        with open(app.outdir / 'api.ndjson', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+    finally:
+        app.cleanup()
+
+
+def test_deleted_doc_dropped_on_fresh_env(tmp_path):
+    srcdir = tmp_path / 'src'
+    builddir = tmp_path / 'build'
+    write_docs(srcdir, {
+        'a': 'A\n=\n\n.. sphinxsharp:type:: public class A\n',
+        'b': 'B\n=\n\n.. sphinxsharp:type:: public class B\n'
+    })
+    assert {r['anchor'] for r in build(srcdir, builddir)} == {'type-A', 'type-B'}
+
+    (srcdir / 'b.rst').unlink()
+    write_docs(srcdir, {'a': 'A\n=\n\n.. sphinxsharp:type:: public class A\n'})
+    assert {r['anchor'] for r in build(srcdir, builddir, freshenv=True)} == {'type-A'}
+
+
+def test_enum_member_value_and_description(tmp_path):
+    write_docs(tmp_path / 'src', {
+        'a': 'A\n=\n\n.. sphinxsharp:enum:: public enum Code\n   :members:\n\n'
+             '   Ok = 0 -- no error\n   Other\n'
+    })
+    records = {r['name']: r for r in build(tmp_path / 'src', tmp_path / 'build')}
+    assert records['Code.Ok']['value'] == '0'
+    assert records['Code.Ok']['description'] == 'no error'
+    assert records['Code.Other']['value'] is None